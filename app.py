@@ -1,4 +1,314 @@
+import asyncio
+import atexit
+import functools
+import hashlib
+import json
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import ElementClickInterceptedException
+
+
+# ---------- consent popup JS ----------
+# Candidate CSS selectors (explicit ones first) and text keywords for the fallback
+CONSENT_SELECTORS = (
+    "button#onetrust-accept-btn-handler",
+    "button[id*='accept']",
+    "button[id*='consent']",
+    "button[class*='accept']",
+    "button[class*='consent']",
+    "button[aria-label*='accept']",
+    "button[aria-label*='consent']",
+    "button[title*='Accept']",
+    "button[title*='Consent']",
+    "a[id*='accept']",
+    "a[class*='accept']",
+)
+CONSENT_KEYWORDS = ("accept", "consent", "agree", "allow", "ok", "yes", "manage options", "consent and proceed")
+# Any *rendered* match means a consent UI may be up; if none is, dismissal is skipped
+CONSENT_PROBE_SELECTOR = "[id*='consent'], [id*='onetrust'], [class*='consent'], [class*='cookie'], [role='dialog']"
+# How long the probe re-checks for a banner injected just after DOMContentLoaded
+CONSENT_PROBE_WAIT = 0.3
+
+# Overlay patterns stripped as the consent last resort, and the narrower set used
+# when something intercepts the sign-in click
+CONSENT_OVERLAY_PATTERNS = ("consent", "cookie", "ccpa", "gdpr", "banner", "overlay", "modal", "dialog")
+SIGNIN_OVERLAY_PATTERNS = ("consent", "overlay", "cookie")
+
+# Removes nodes whose id/class contains any pattern (plus [role=dialog]); with sweepZIndex
+# also hides obvious full-screen overlays. Returns the number of removed nodes.
+_JS_REMOVE_OVERLAYS_FN = """function(patterns, sweepZIndex){
+  let removed = 0;
+  patterns.forEach(p=>{
+    document.querySelectorAll('[id*='+JSON.stringify(p)+'], [class*='+JSON.stringify(p)+'], [role="dialog"]').forEach(el=>{
+      try{ el.style.display='none'; el.remove(); removed++; }catch(e){}
+    });
+  });
+  if (sweepZIndex){
+    // Hide obvious full-screen overlays (high z-index & non-transparent)
+    document.querySelectorAll('div').forEach(d=>{
+      try{
+        const s = window.getComputedStyle(d);
+        if (s && s.position && s.zIndex && parseInt(s.zIndex||0) > 1000 && s.backgroundColor && s.backgroundColor !== 'rgba(0, 0, 0, 0)'){
+          d.style.display='none'; d.remove(); removed++;
+        }
+      }catch(e){}
+    });
+  }
+  return removed;
+}"""
+# Expression (for cdp_eval) used when something intercepts the sign-in click
+_JS_REMOVE_SIGNIN_OVERLAYS = "(" + _JS_REMOVE_OVERLAYS_FN + ")(" + json.dumps(list(SIGNIN_OVERLAY_PATTERNS)) + ", false)"
+
+# One in-page pass of the whole dismissal strategy. Registered on every new document
+# via Page.addScriptToEvaluateOnNewDocument so later calls only ship a one-line invocation.
+# Signature: (selectors, keywords, overlayPatterns).
+_JS_DISMISS_CONSENT_DEF = """
+window.__ahDismissConsent = function(selectors, keywords, overlayPatterns){
+  const removeOverlays = """ + _JS_REMOVE_OVERLAYS_FN + """;
+  function tryClick(el){
+    try{ el.scrollIntoView({block:'center'}); el.click(); return true; }catch(e){ return false; }
+  }
+  // Explicit selectors first
+  for (const sel of selectors){
+    let elems = [];
+    try{ elems = document.querySelectorAll(sel); }catch(e){ continue; }
+    for (const el of elems){
+      if (tryClick(el)) return {clicked: sel, text: null, removed: 0};
+    }
+  }
+  // Text-match fallback across all visible buttons and links
+  for (const el of document.querySelectorAll('button, a')){
+    if (!el.getClientRects().length) continue;
+    const txt = (el.innerText || '').trim().toLowerCase();
+    if (keywords.some(k => txt.includes(k)) && tryClick(el)){
+      return {clicked: null, text: txt.slice(0, 40), removed: 0};
+    }
+  }
+  // Last-resort: remove overlay-like nodes (non-destructive best-effort)
+  return {clicked: null, text: null, removed: removeOverlays(overlayPatterns, true)};
+};
+"""
+# Expression template (for cdp_eval); {args} are the JSON-encoded arguments. Yields null
+# when the definition is missing (document loaded before registration).
+_JS_CALL_DISMISS_CONSENT = "window.__ahDismissConsent ? window.__ahDismissConsent({args}) : null"
+# Expression (for cdp_eval): true when any probe match is rendered; hidden or
+# pre-rendered modals (display:none, detached) have no client rects
+_JS_CONSENT_VISIBLE = (
+    "Array.from(document.querySelectorAll(" + json.dumps(CONSENT_PROBE_SELECTOR) + "))"
+    ".some(el => el.getClientRects().length > 0)"
+)
+
+
+# ---------- listing page JS ----------
+# Boost buttons on the listing page; every listing script embeds this one definition
+BOOST_BTN_SEL = "button.usage-boost-button, button.cmn--btn.usage-boost-button"
+_JS_BOOST_BTN_SEL = json.dumps(BOOST_BTN_SEL)
+# Listing cards (site markup first, then generic fallbacks)
+LISTING_CARD_SEL = ".listing--card, .listing--item, .listing--property--wrapper, [data-address], .listing-card, .ah--card, li.listing"
+# Expression (for cdp_eval): true once the listing page has fully loaded and shows a card
+# or boost button, which only a signed-in session gets (logged-out loads redirect away)
+_JS_LISTING_READY = (
+    "document.readyState === 'complete' && !!document.querySelector("
+    + json.dumps(LISTING_CARD_SEL + ", " + BOOST_BTN_SEL) + ")"
+)
+
+# Scrolls a viewport every 120ms until the page height has been stable for idleMs while
+# at the bottom of the page (or the scroll budget runs out); DOM mutations only count
+# when they change the height, so carousels or chat widgets do not keep it scrolling.
+# Then waits for boost buttons to appear (resolving on the DOM mutation that adds them)
+# or the timeout to expire.
+# arguments: pollTimeoutMs, scrollBudgetMs, idleMs, callback.
+_JS_SCROLL_AND_FIND_BUTTONS = """
+const pollTimeoutMs = arguments[0], scrollBudgetMs = arguments[1], idleMs = arguments[2];
+const done = arguments[arguments.length - 1];
+const sel = """ + _JS_BOOST_BTN_SEL + """;
+const scrollDeadline = Date.now() + scrollBudgetMs;
+let loops = 0, lastHeight = document.body.scrollHeight, lastGrowth = Date.now();
+function trackHeight(){
+  const h = document.body.scrollHeight;
+  if (h !== lastHeight){ lastHeight = h; lastGrowth = Date.now(); }
+}
+const mo = new MutationObserver(trackHeight);
+mo.observe(document.body, {childList: true, subtree: true});
+function waitForButtons(){
+  const count = () => document.querySelectorAll(sel).length;
+  const t0 = Date.now();
+  const finish = (n) => done({n: n, loops: loops, waitedMs: Date.now() - t0});
+  if (count() > 0) return finish(count());
+  const bo = new MutationObserver(() => {
+    const n = count();
+    if (n > 0){ bo.disconnect(); clearTimeout(timer); finish(n); }
+  });
+  const timer = setTimeout(() => { bo.disconnect(); finish(count()); }, pollTimeoutMs);
+  bo.observe(document.body, {childList: true, subtree: true});
+}
+function step(){
+  window.scrollBy(0, window.innerHeight);
+  loops++;
+  trackHeight();
+  const atBottom = window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;
+  if ((atBottom && Date.now() - lastGrowth > idleMs) || Date.now() >= scrollDeadline){
+    mo.disconnect();
+    return waitForButtons();
+  }
+  setTimeout(step, 120);
+}
+step();
+"""
+
+# Address of a boost button's listing: one closest() to the card (site markup first, then
+# generic fallbacks), reading data-address or the first address-like node; failing that,
+# the nearest ancestor (8 levels) holding an address-like node, stopping before any
+# ancestor that wraps more than one boost button (the list, not this listing). Returns
+# null if none.
+_JS_FIND_ADDRESS_FN = """function(btn){
+  const cardSel = """ + json.dumps(LISTING_CARD_SEL) + """;
+  const addrSels = ['.listing--property--address span', '.listing--property--address', '[class*="address"]', '.listing-address', 'h3'];
+  const textOf = el => el ? (el.innerText || el.textContent || '').trim() : '';
+  function addressIn(root){
+    for (const s of addrSels){
+      const t = textOf(root.querySelector(s));
+      if (t) return t;
+    }
+    return '';
+  }
+  const card = btn.closest(cardSel);
+  if (card){
+    const addr = (card.getAttribute('data-address') || '').trim() || addressIn(card);
+    if (addr) return addr;
+  }
+  for (let el = btn.parentElement, depth = 0; el && depth < 8; el = el.parentElement, depth++){
+    if (el.querySelectorAll(""" + _JS_BOOST_BTN_SEL + """).length > 1) break;
+    const addr = addressIn(el);
+    if (addr) return addr;
+  }
+  return null;
+}"""
+
+# Expression (for cdp_eval) yielding [{i, text, classes, address}] for every boost button
+# in document order.
+_JS_COLLECT_BUTTONS = """
+(() => {
+  const findAddress = """ + _JS_FIND_ADDRESS_FN + """;
+  const sel = """ + _JS_BOOST_BTN_SEL + """;
+  return Array.from(document.querySelectorAll(sel)).map((b, i) => ({
+    i: i,
+    text: (b.innerText || b.textContent || '').trim().toLowerCase(),
+    classes: (b.className || '').toString().toLowerCase(),
+    address: findAddress(b)
+  }));
+})()
+"""
+
+# Clicks the boost buttons at the given indices (as returned by _JS_COLLECT_BUTTONS) one
+# after another. Each click waits two animation frames after scrolling (each capped at
+# ~16ms, since rAF never fires in hidden/occluded windows), then up to
+# confirmMs for the button to switch to its in-progress state (200ms if it never does).
+# arguments: indices, confirmMs, callback.
+# Resolves with one {error, confirmed} entry per index.
+_JS_CLICK_BUTTONS = """
+const indices = arguments[0], confirmMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const all = Array.from(document.querySelectorAll(""" + _JS_BOOST_BTN_SEL + """));
+const sleep = ms => new Promise(r => setTimeout(r, ms));
+const frame = () => new Promise(r => { requestAnimationFrame(() => r()); setTimeout(r, 16); });
+function inProgress(b){
+  const cls = (b.className || '').toString().toLowerCase();
+  const txt = (b.innerText || b.textContent || '').toLowerCase();
+  return !b.isConnected || cls.includes('usage-boost-inprogress') || txt.includes('progress');
+}
+async function waitInProgress(b){
+  const deadline = Date.now() + confirmMs;
+  while (Date.now() < deadline){
+    if (inProgress(b)) return true;
+    await sleep(50);
+  }
+  return false;
+}
+(async () => {
+  const out = [];
+  for (const i of indices){
+    const b = all[i];
+    if (!b || !b.isConnected){ out.push({error: 'button ' + i + ' no longer in page', confirmed: false}); continue; }
+    try{
+      b.scrollIntoView({block:'center'});
+      await frame(); await frame();
+      b.click();
+    }catch(e){ out.push({error: String(e), confirmed: false}); continue; }
+    const confirmed = await waitInProgress(b);
+    if (!confirmed) await sleep(200);
+    out.push({error: null, confirmed: confirmed});
+  }
+  done(out);
+})();
+"""
+
+
+# ---------- devtools helpers ----------
+def cdp_eval(driver, expression: str):
+    """
+    Evaluates a JS expression via CDP Runtime.evaluate and returns its value.
+    Cheaper than execute_script for reads that need no WebElement references.
+    """
+    res = driver.execute_cdp_cmd("Runtime.evaluate", {"expression": expression, "returnByValue": True})
+    if res.get("exceptionDetails"):
+        raise Exception(f"Runtime.evaluate failed: {res['exceptionDetails'].get('text')}")
+    return res.get("result", {}).get("value")
+
+
+def cdp_screenshot(driver, quality: int = 60) -> str:
+    """Captures the viewport as a base64 JPEG via CDP Page.captureScreenshot."""
+    return driver.execute_cdp_cmd("Page.captureScreenshot", {"format": "jpeg", "quality": quality})["data"]
+
+
 # ---------- consent popup helper ----------
+def wait_until_gone(driver, css_selector: str, timeout: float) -> bool:
+    """
+    Polls (100ms) until no visible element matches css_selector.
+    Returns True as soon as it is gone, False on timeout. Never raises.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            EC.invisibility_of_element_located((By.CSS_SELECTOR, css_selector))
+        )
+        return True
+    except Exception:
+        return False
+
+
+# Persisted selector that last dismissed the banner (profile-guided ordering)
+CONSENT_HINT_PATH = "/tmp/ah_consent_hint.json"
+_consent_hint: Optional[str] = None
+
+
+def load_consent_hint() -> Optional[str]:
+    """Returns the selector that last dismissed the consent popup, or None if unknown."""
+    global _consent_hint
+    if _consent_hint is None:
+        try:
+            with open(CONSENT_HINT_PATH, encoding="utf-8") as f:
+                _consent_hint = json.load(f).get("selector") or ""
+        except Exception:
+            _consent_hint = ""
+    return _consent_hint or None
+
+
+def save_consent_hint(selector: str) -> None:
+    """Remembers the winning selector in memory and on disk (best-effort)."""
+    global _consent_hint
+    _consent_hint = selector
+    try:
+        with open(CONSENT_HINT_PATH, "w", encoding="utf-8") as f:
+            json.dump({"selector": selector}, f)
+    except Exception:
+        pass
+
+
 def dismiss_consent_popup(driver, logs, max_attempts: int = 3):
     """
     Aggressively tries to dismiss cookie/consent popups.
@@ -6,107 +316,61 @@ def dismiss_consent_popup(driver, logs, max_attempts: int = 3):
     Non-fatal, logs attempts.
     """
     try:
-        for attempt in range(1, max_attempts + 1):
-            logs.append(f"Consent dismissal attempt {attempt}/{max_attempts}")
-            # Candidate CSS selectors (explicit ones first)
-            selectors = [
-                "button#onetrust-accept-btn-handler",
-                "button[id*='accept']",
-                "button[id*='consent']",
-                "button[class*='accept']",
-                "button[class*='consent']",
-                "button[aria-label*='accept']",
-                "button[aria-label*='consent']",
-                "button[title*='Accept']",
-                "button[title*='Consent']",
-                "a[id*='accept']",
-                "a[class*='accept']",
-            ]
-
-            # Try explicit selectors
-            for sel in selectors:
-                try:
-                    elems = driver.find_elements(By.CSS_SELECTOR, sel)
-                except Exception:
-                    elems = []
-                if elems:
-                    for el in elems:
-                        try:
-                            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                            time.sleep(0.25)
-                            el.click()
-                            logs.append(f"Clicked consent using selector: {sel}")
-                            time.sleep(0.6)
-                            return True
-                        except Exception:
-                            try:
-                                driver.execute_script("arguments[0].click();", el)
-                                logs.append(f"JS-clicked consent using selector: {sel}")
-                                time.sleep(0.6)
-                                return True
-                            except Exception:
-                                continue
-
-            # Text-match fallback across all buttons and links
+        # cheap in-page visibility probe first; the short re-check covers banners injected
+        # just after DOMContentLoaded
+        deadline = time.time() + CONSENT_PROBE_WAIT
+        while True:
             try:
-                candidates = driver.find_elements(By.TAG_NAME, "button") + driver.find_elements(By.TAG_NAME, "a")
-                for el in candidates:
-                    try:
-                        txt = (el.text or "").strip().lower()
-                        if any(k in txt for k in ("accept", "consent", "agree", "allow", "ok", "yes", "manage options", "consent and proceed")):
-                            try:
-                                driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                                time.sleep(0.2)
-                                el.click()
-                                logs.append(f"Clicked consent by text match: '{txt[:40]}'")
-                                time.sleep(0.6)
-                                return True
-                            except Exception:
-                                try:
-                                    driver.execute_script("arguments[0].click();", el)
-                                    logs.append(f"JS-clicked consent by text match: '{txt[:40]}'")
-                                    time.sleep(0.6)
-                                    return True
-                                except Exception:
-                                    continue
-                    except Exception:
-                        continue
+                visible = bool(cdp_eval(driver, _JS_CONSENT_VISIBLE))
             except Exception:
-                pass
+                visible = True  # can't tell: fall through to the full dismissal
+            if visible:
+                break
+            if time.time() >= deadline:
+                logs.append("No consent banner present")
+                return True
+            time.sleep(0.1)
+
+        # the selector that worked last time goes first
+        hint = load_consent_hint()
+        selectors = CONSENT_SELECTORS
+        if hint:
+            selectors = (hint,) + tuple(sel for sel in CONSENT_SELECTORS if sel != hint)
+        call_args = ", ".join(json.dumps(list(a)) for a in (selectors, CONSENT_KEYWORDS, CONSENT_OVERLAY_PATTERNS))
+        call_expr = _JS_CALL_DISMISS_CONSENT.format(args=call_args)
 
-            # Last-resort: remove overlay-like nodes via JS (non-destructive best-effort)
+        for attempt in range(1, max_attempts + 1):
+            logs.append(f"Consent dismissal attempt {attempt}/{max_attempts}")
+
+            # Selector click, text-match fallback and overlay removal in one call
             try:
-                js_remove = """
-                (function(){
-                  const patterns = ['consent','cookie','ccpa','gdpr','banner','overlay','modal','dialog'];
-                  let removed = 0;
-                  patterns.forEach(p=>{
-                    document.querySelectorAll('[id*='+JSON.stringify(p)+'], [class*='+JSON.stringify(p)+'], [role=\"dialog\"]').forEach(el=>{
-                      try{ el.style.display='none'; el.remove(); removed++; }catch(e){}
-                    });
-                  });
-                  // Hide obvious full-screen overlays (high z-index & non-transparent)
-                  document.querySelectorAll('div').forEach(d=>{
-                    try{
-                      const s = window.getComputedStyle(d);
-                      if (s && s.position && s.zIndex && parseInt(s.zIndex||0) > 1000 && s.backgroundColor && s.backgroundColor !== 'rgba(0, 0, 0, 0)'){
-                        d.style.display='none'; d.remove(); removed++;
-                      }
-                    }catch(e){}
-                  });
-                  return removed;
-                })();
-                """
-                removed_count = driver.execute_script(js_remove)
-                logs.append(f"Attempted overlay removal via JS, removed_count={removed_count}")
-                if removed_count > 0:
-                    time.sleep(0.5)
-                    return True
+                result = cdp_eval(driver, call_expr)
+                if result is None:
+                    # not preloaded on this document: ship the definition once
+                    result = cdp_eval(driver, _JS_DISMISS_CONSENT_DEF + call_expr)
+                result = result or {}
             except Exception as e:
-                logs.append(f"Overlay removal attempt failed: {e}")
+                logs.append(f"Consent dismissal script failed: {e}")
+                result = {}
+
+            if result.get("clicked"):
+                logs.append(f"Clicked consent using selector: {result['clicked']}")
+                if result["clicked"] != hint:
+                    save_consent_hint(result["clicked"])
+                wait_until_gone(driver, result["clicked"], 2)
+                return True
+            if result.get("text"):
+                logs.append(f"Clicked consent by text match: '{result['text']}'")
+                wait_until_gone(driver, "[role='dialog']", 2)
+                return True
 
-            # small wait before retry
-            time.sleep(0.8)
+            removed_count = result.get("removed", 0)
+            logs.append(f"Attempted overlay removal via JS, removed_count={removed_count}")
+            if removed_count > 0:
+                return True
+
+            # before retrying, give a dialog that is already closing a moment to go away
+            wait_until_gone(driver, "[role='dialog']", 0.8)
 
         logs.append("Consent popup present but no known button found to dismiss (after retries)")
         return False
@@ -116,243 +380,617 @@ def dismiss_consent_popup(driver, logs, max_attempts: int = 3):
         return False
 
 
-# ---------- selenium worker (modified only for consent + robust clicks) ----------
-def selenium_boost_worker(email: str, password: str, num_buttons: int, headless: bool,
-                          wait_time: int = DEFAULT_WAIT_TIME) -> BoostResponse:
-    logs: List[str] = []
-    clicked_addresses: List[Optional[str]] = []
-    screenshot_b64 = None
-    driver = None
+# ---------- driver pool ----------
+# Warm drivers kept between worker calls (one queue per headless mode), so a
+# request only pays Chrome/chromedriver start-up when no idle driver is available.
+POOL_SIZE = int(os.environ.get("POOL_SIZE", "2"))
+_DRIVER_POOLS = {True: queue.Queue(maxsize=POOL_SIZE), False: queue.Queue(maxsize=POOL_SIZE)}
+# Drivers are quit and replaced after this many worker runs to cap Chrome memory growth
+MAX_USES_PER_INSTANCE = int(os.environ.get("MAX_USES_PER_INSTANCE", "50"))
+_DRIVER_USES: Dict[object, int] = {}
+# Origins (including iframes) each driver has loaded since its last reset; their storage
+# is wiped before the driver goes back to the pool
+_DRIVER_ORIGINS: Dict[object, set] = {}
+# Site origin, always wiped between pooled uses
+SITE_HOST = "www.affordablehousing.com"
+SITE_ORIGIN = f"https://{SITE_HOST}"
+
+# URL patterns blocked when AH_BLOCK_MEDIA is set
+BLOCKED_URL_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.woff", "*.woff2", "*.mp4",
+    "*googletagmanager*", "*google-analytics*", "*/analytics*", "*doubleclick*", "*facebook.net*",
+)
+
+
+# Binary locations cannot change while the process runs; resolve them once
+@functools.lru_cache(maxsize=1)
+def _chrome_binary() -> Optional[str]:
+    return find_chrome_binary()
+
+
+@functools.lru_cache(maxsize=1)
+def _chromedriver_binary() -> Optional[str]:
+    return find_chromedriver_binary()
+
+
+# (expires_at, ip) for SITE_HOST; re-resolved after SITE_DNS_TTL seconds
+SITE_DNS_TTL = 600
+_site_ip_cache = (0.0, None)
+
+
+def _resolve_site_ip() -> Optional[str]:
+    """IPv4 address of SITE_HOST, cached for SITE_DNS_TTL (None if resolution fails)."""
+    global _site_ip_cache
+    expires_at, ip = _site_ip_cache
+    if time.time() < expires_at:
+        return ip
     try:
-        logs.append("Starting Selenium worker")
+        ip = socket.getaddrinfo(SITE_HOST, 443, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+    except Exception:
+        ip = None
+    _site_ip_cache = (time.time() + (SITE_DNS_TTL if ip else 30), ip)
+    return ip
+
+
+# Chrome switches shared by every driver; per-driver ones are added in _build_options
+_BASE_OPTIONS_ARGS = (
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--window-size=1920,1080",
+    "--lang=en-US",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--disable-default-apps",
+    "--ignore-certificate-errors",
+    "--remote-debugging-port=0",
+    # replaces headless Chrome's default "HeadlessChrome" UA token, which sites flag as a bot
+    "user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36",
+)
+# Added with AH_LOW_MEM: bound renderer count and JIT memory for long-lived pooled drivers
+_LOW_MEM_OPTIONS_ARGS = (
+    "--renderer-process-limit=2",
+    "--disable-features=TranslateUI,BackForwardCache",
+    "--js-flags=--lite-mode",
+)
+
+
+def _build_options(headless: bool, chrome_bin: Optional[str], proxy: Optional[str]):
+    options = webdriver.ChromeOptions()
+    # driver.get returns at DOMContentLoaded; every step after it uses explicit waits
+    options.page_load_strategy = "eager"
+    if headless:
+        options.add_argument("--headless=new")
+    for arg in _BASE_OPTIONS_ARGS:
+        options.add_argument(arg)
+    if os.environ.get("AH_LOW_MEM", "").lower() in ("1", "true", "yes"):
+        for arg in _LOW_MEM_OPTIONS_ARGS:
+            options.add_argument(arg)
+
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    if os.environ.get("AH_BLOCK_MEDIA", "").lower() in ("1", "true", "yes"):
+        # no image decoding at all (inline/data: images included); CSS stays, layout needs it
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    if chrome_bin:
+        options.binary_location = chrome_bin
+    # if proxy env set, pass it to Chrome
+    if proxy:
+        options.add_argument(f"--proxy-server={proxy}")
+    elif os.environ.get("AH_PIN_DNS", "").lower() in ("1", "true", "yes"):
+        # skip Chrome's DNS lookup for the site for this driver's lifetime
+        site_ip = _resolve_site_ip()
+        if site_ip:
+            options.add_argument(f"--host-resolver-rules=MAP {SITE_HOST} {site_ip}")
+    return options
+
 
-        # do network pre-check unless skipped
-        test_url = "https://www.affordablehousing.com/"
+def create_driver(headless: bool, logs: List[str]):
+    """Starts a new Chrome driver with the worker's options and preloaded page scripts."""
+    chrome_bin = _chrome_binary()
+    chromedriver_bin = _chromedriver_binary()
+    logs.append(f"Detected chrome binary: {chrome_bin or '<none>'}")
+    logs.append(f"Detected chromedriver binary: {chromedriver_bin or '<none>'}")
+
+    if not chromedriver_bin:
+        raise Exception("Chromedriver binary not found. Set CHROMEDRIVER_PATH or install chromedriver in the image.")
+
+    proxy_env = os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
+    if proxy_env:
+        logs.append(f"Setting Chrome proxy: {proxy_env}")
+    options = _build_options(headless, chrome_bin, proxy_env)
+
+    # instantiate driver
+    service = ChromeService(executable_path=chromedriver_bin)
+    driver = webdriver.Chrome(service=service, options=options)
+    # lookups that may legitimately miss must return at once; waiting is done by WebDriverWait
+    driver.implicitly_wait(0)
+    try:
+        # small stealth: override navigator.webdriver
+        driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument",
+            {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"},
+        )
+    except Exception:
+        pass
+    try:
+        # preload the consent dismissal function on every new document
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _JS_DISMISS_CONSENT_DEF})
+    except Exception as e:
+        logs.append(f"Could not preload consent script: {e}")
+
+    # optionally skip downloading media/fonts/trackers the worker never reads
+    if os.environ.get("AH_BLOCK_MEDIA", "").lower() in ("1", "true", "yes"):
         try:
-            network_precheck(test_url, timeout=6, logs=logs)
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+            logs.append(f"Blocking {len(BLOCKED_URL_PATTERNS)} media/analytics URL patterns")
         except Exception as e:
-            logs.append(f"Pre-check failed: {e}")
-            # re-raise to return a helpful response (unless SKIP_NETWORK_CHECK true)
-            if os.environ.get("SKIP_NETWORK_CHECK", "").lower() not in ("1", "true", "yes"):
-                raise Exception(
-                    f"Network pre-check failed for {test_url}. Either outbound network is blocked or the site resets connections. Full error: {e}"
-                )
-            # else continue (skip pre-check)
-
-        chrome_bin = find_chrome_binary()
-        chromedriver_bin = find_chromedriver_binary()
-        logs.append(f"Detected chrome binary: {chrome_bin or '<none>'}")
-        logs.append(f"Detected chromedriver binary: {chromedriver_bin or '<none>'}")
-
-        if not chromedriver_bin:
-            raise Exception("Chromedriver binary not found. Set CHROMEDRIVER_PATH or install chromedriver in the image.")
-
-        # build Chrome options
-        options = webdriver.ChromeOptions()
-        if headless:
-            options.add_argument("--headless=new")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--lang=en-US")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-background-networking")
-        options.add_argument("--disable-sync")
-        options.add_argument("--metrics-recording-only")
-        options.add_argument("--disable-default-apps")
-        options.add_argument("--ignore-certificate-errors")
-        options.add_argument("--remote-debugging-port=0")
-        options.add_argument("--disable-features=VizDisplayCompositor")
-        options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36")
-
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option("useAutomationExtension", False)
-
-        if chrome_bin:
-            options.binary_location = chrome_bin
-
-        # if proxy env set, pass it to Chrome
-        proxy_env = os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
-        if proxy_env:
-            logs.append(f"Setting Chrome proxy: {proxy_env}")
-            options.add_argument(f"--proxy-server={proxy_env}")
-
-        # instantiate driver
-        service = ChromeService(executable_path=chromedriver_bin)
-        driver = webdriver.Chrome(service=service, options=options)
+            logs.append(f"Could not set blocked URLs: {e}")
+
+    return driver
+
+
+def acquire_driver(headless: bool, logs: List[str]):
+    """Returns an idle pooled driver, or starts a new one when the pool is empty."""
+    pool = _DRIVER_POOLS[bool(headless)]
+    while True:
         try:
-            # small stealth: override navigator.webdriver
-            driver.execute_cdp_cmd(
-                "Page.addScriptToEvaluateOnNewDocument",
-                {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"},
-            )
+            driver = pool.get_nowait()
+        except queue.Empty:
+            return create_driver(headless, logs)
+        try:
+            # cheap liveness probe: Chrome/chromedriver may have died while idle
+            driver.execute_cdp_cmd("Browser.getVersion", {})
         except Exception:
+            logs.append("Discarding dead pooled driver")
+            _quit_driver(driver)
+            continue
+        logs.append(f"Reusing pooled driver (uses={_DRIVER_USES.get(driver, 0)})")
+        return driver
+
+
+def note_origins(driver) -> None:
+    """Records the origins of the current page and all of its frames (best-effort)."""
+    try:
+        stack = [driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]]
+    except Exception:
+        return
+    origins = _DRIVER_ORIGINS.setdefault(driver, set())
+    while stack:
+        node = stack.pop()
+        origin = node.get("frame", {}).get("securityOrigin") or ""
+        if origin.startswith(("http://", "https://")):
+            origins.add(origin)
+        stack.extend(node.get("childFrames", []))
+
+
+def release_driver(driver, headless: bool, logs: List[str]) -> None:
+    """
+    Clears cookies, cache and the storage of every origin the run visited (see
+    note_origins), parks the driver on about:blank and returns it to the pool.
+    Quits the driver instead once it reached MAX_USES_PER_INSTANCE, if the reset
+    fails or if the pool is already full.
+    """
+    uses = _DRIVER_USES.get(driver, 0) + 1
+    _DRIVER_USES[driver] = uses
+    if uses >= MAX_USES_PER_INSTANCE:
+        logs.append(f"Recycling driver after {uses} uses")
+    else:
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+            # local/session storage, IndexedDB, service workers: next user starts clean
+            note_origins(driver)
+            for origin in _DRIVER_ORIGINS.pop(driver, set()) | {SITE_ORIGIN}:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            driver.get("about:blank")
+            _DRIVER_POOLS[bool(headless)].put_nowait(driver)
+            logs.append("Driver returned to pool")
+            return
+        except queue.Full:
             pass
+        except Exception as e:
+            logs.append(f"Driver reset failed, discarding it: {e}")
+    _quit_driver(driver)
+    logs.append("Driver.quit() called")
 
-        wait = WebDriverWait(driver, wait_time or DEFAULT_WAIT_TIME)
 
-        # robust GET with retries/backoff
-        tries = 3
-        for attempt in range(1, tries + 1):
+def warm_driver_pool(headless: bool = True, count: int = POOL_SIZE) -> List[str]:
+    """
+    Starts drivers until the pool holds `count` idle ones (meant for app start-up).
+    Returns the collected logs.
+    """
+    logs: List[str] = []
+    logs.append(f"Resolved {SITE_HOST} -> {_resolve_site_ip() or '<unresolved>'}")
+    pool = _DRIVER_POOLS[bool(headless)]
+    while pool.qsize() < min(count, POOL_SIZE):
+        try:
+            driver = create_driver(headless, logs)
+        except Exception as e:
+            logs.append(f"Driver pre-warm failed: {e}")
+            break
+        try:
+            pool.put_nowait(driver)
+        except queue.Full:
+            _quit_driver(driver)
+            break
+    logs.append(f"Driver pool warm: {pool.qsize()} idle (headless={headless})")
+    return logs
+
+
+def shutdown_driver_pool() -> None:
+    """Quits every idle pooled driver. Registered with atexit; safe to call twice."""
+    for pool in _DRIVER_POOLS.values():
+        while True:
             try:
-                driver.get("https://www.affordablehousing.com/")
-                logs.append("Opened affordablehousing.com (via driver.get)")
-                # Attempt to dismiss cookie/consent overlay right away
-                try:
-                    dismissed = dismiss_consent_popup(driver, logs, max_attempts=3)
-                    logs.append(f"dismiss_consent_popup result: {dismissed}")
-                except Exception as e:
-                    logs.append(f"Error while attempting to dismiss consent popup: {e}")
+                driver = pool.get_nowait()
+            except queue.Empty:
                 break
+            _quit_driver(driver)
+
+
+def _quit_driver(driver) -> None:
+    _DRIVER_USES.pop(driver, None)
+    _DRIVER_ORIGINS.pop(driver, None)
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+atexit.register(shutdown_driver_pool)
+
+
+# ---------- background I/O ----------
+# Error-path debug artefacts are written off the worker's return path
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="boost-io")
+# Network pre-checks overlap driver start-up; separate pool so a slow probe never delays
+# another worker's error screenshot, sized so every concurrent worker has one in flight
+_PRECHECK_POOL = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="boost-precheck")
+PAGE_SOURCE_PATH = "/tmp/affordablehousing_page.html"
+
+
+def _dump_page_source(driver, path: str, logs: List[str]) -> None:
+    try:
+        page_html = driver.page_source
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(page_html)
+        logs.append(f"Saved page source to {path}")
+    except Exception as e:
+        logs.append(f"Failed to save page source: {e}")
+
+
+def _release_after(jobs: list, driver, headless: bool, logs: List[str]) -> None:
+    """
+    Releases driver once every future in jobs has finished, without blocking a thread.
+    The response is gone by then, so logs (the jobs' own lines plus the release) are
+    printed to stdout, i.e. the container log.
+    """
+    pending = [len(jobs)]
+    lock = threading.Lock()
+
+    def _on_done(_f):
+        with lock:
+            pending[0] -= 1
+            last = pending[0] == 0
+        if last:
+            release_driver(driver, headless, logs)
+            for line in logs:
+                print(f"[boost-bg] {line}", flush=True)
+
+    for job in jobs:
+        job.add_done_callback(_on_done)
+
+
+# ---------- login helpers ----------
+def open_homepage(driver, logs: List[str]) -> None:
+    """Opens the homepage (3 tries with backoff) and dismisses the consent popup."""
+    # robust GET with retries/backoff
+    tries = 3
+    for attempt in range(1, tries + 1):
+        try:
+            driver.get("https://www.affordablehousing.com/")
+            logs.append("Opened affordablehousing.com (via driver.get)")
+            note_origins(driver)
+            # Attempt to dismiss cookie/consent overlay right away
+            try:
+                dismissed = dismiss_consent_popup(driver, logs, max_attempts=3)
+                logs.append(f"dismiss_consent_popup result: {dismissed}")
             except Exception as e:
-                logs.append(f"driver.get attempt {attempt} failed: {e}")
-                if attempt == tries:
-                    raise
-                time.sleep(1.5 * attempt)
+                logs.append(f"Error while attempting to dismiss consent popup: {e}")
+            break
+        except Exception as e:
+            logs.append(f"driver.get attempt {attempt} failed: {e}")
+            if attempt == tries:
+                raise
+            time.sleep(1.5 * attempt)
+
 
-        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "li.ah--signin--link"))).click()
-        logs.append("Clicked homepage Sign In")
+def sign_in(driver, wait, email: str, password: str, logs: List[str]) -> None:
+    """Runs the homepage sign-in flow; returns once the dashboard is reached."""
+    signin_link = (By.CSS_SELECTOR, "li.ah--signin--link")
+    try:
+        wait.until(EC.element_to_be_clickable(signin_link)).click()
+    except ElementClickInterceptedException:
+        # a consent banner that showed up after the homepage probe covers the link
+        logs.append("Homepage Sign In click intercepted; retrying consent dismissal")
+        dismiss_consent_popup(driver, logs, max_attempts=3)
+        wait.until(EC.element_to_be_clickable(signin_link)).click()
+    logs.append("Clicked homepage Sign In")
 
-        email_input = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "input#ah_user")))
-        email_input.clear()
-        email_input.send_keys(email)
-        logs.append("Entered email")
+    email_input = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "input#ah_user")))
+    email_input.clear()
+    email_input.send_keys(email)
+    logs.append("Entered email")
 
-        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button#signin-button"))).click()
-        logs.append("Clicked first Sign In button")
+    wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button#signin-button"))).click()
+    logs.append("Clicked first Sign In button")
 
-        password_input = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "input#ah_pass")))
-        password_input.clear()
-        password_input.send_keys(password)
-        logs.append("Entered password")
+    password_input = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "input#ah_pass")))
+    note_origins(driver)  # the login form may live in another frame/origin
+    password_input.clear()
+    password_input.send_keys(password)
+    logs.append("Entered password")
 
-        # Robust final sign-in click with retries and overlay-removal fallback
-        signin_selector = (By.CSS_SELECTOR, "button#signin-with-password-button")
-        signin_button = wait.until(EC.element_to_be_clickable(signin_selector))
+    # Robust final sign-in click with retries and overlay-removal fallback
+    signin_selector = (By.CSS_SELECTOR, "button#signin-with-password-button")
+    signin_button = wait.until(EC.element_to_be_clickable(signin_selector))
 
-        clicked = False
-        for attempt in range(1, 4):
+    clicked = False
+    for attempt in range(1, 4):
+        try:
+            signin_button = WebDriverWait(driver, 5, poll_frequency=0.1).until(
+                EC.element_to_be_clickable(signin_selector)
+            )
+            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", signin_button)
+            signin_button.click()
+            clicked = True
+            logs.append("Clicked final Sign In button (normal click)")
+            break
+        except Exception as e:
+            logs.append(f"Sign-in normal click attempt {attempt} failed: {e}")
             try:
-                driver.execute_script("arguments[0].scrollIntoView({block:'center'});", signin_button)
-                time.sleep(0.4)
-                signin_button.click()
+                driver.execute_script("arguments[0].click();", signin_button)
                 clicked = True
-                logs.append("Clicked final Sign In button (normal click)")
+                logs.append("Clicked final Sign In button (JS fallback)")
                 break
-            except Exception as e:
-                logs.append(f"Sign-in normal click attempt {attempt} failed: {e}")
+            except Exception as je:
+                logs.append(f"Sign-in JS click attempt {attempt} failed: {je}")
+                # Try to remove likely overlay nodes and retry
                 try:
-                    driver.execute_script("arguments[0].click();", signin_button)
-                    clicked = True
-                    logs.append("Clicked final Sign In button (JS fallback)")
-                    break
-                except Exception as je:
-                    logs.append(f"Sign-in JS click attempt {attempt} failed: {je}")
-                    # Try to remove likely overlay nodes and retry
-                    try:
-                        driver.execute_script("""
-                            document.querySelectorAll('[class*="consent"], [class*="overlay"], [class*="cookie"], [role="dialog"]').forEach(e=>{ try{ e.style.display='none'; e.remove(); } catch(e){}});
-                        """)
-                        logs.append("Tried removing overlay nodes after click interception")
-                    except Exception as re:
-                        logs.append(f"Failed overlay cleanup: {re}")
-                    time.sleep(0.6)
-
-        if not clicked:
-            raise Exception("Could not click final sign-in button after multiple attempts")
-        logs.append("Clicked final Sign In button (completed)")
-
-        wait.until(EC.url_contains("dashboard"))
-        logs.append("Login confirmed (dashboard)")
-
-        listing_url = "https://www.affordablehousing.com/v4/pages/Listing/Listing.aspx"
+                    cdp_eval(driver, _JS_REMOVE_SIGNIN_OVERLAYS)
+                    logs.append("Tried removing overlay nodes after click interception")
+                except Exception as re:
+                    logs.append(f"Failed overlay cleanup: {re}")
+                wait_until_gone(driver, "[role='dialog']", 0.6)
+
+    if not clicked:
+        raise Exception("Could not click final sign-in button after multiple attempts")
+    logs.append("Clicked final Sign In button (completed)")
+
+    wait.until(EC.url_contains("dashboard"))
+    note_origins(driver)
+    logs.append("Login confirmed (dashboard)")
+
+
+# Logged-in cookies reused across worker runs. Kept in memory only and keyed by a hash of
+# email *and* password, so a wrong password never picks up someone's live session.
+SESSION_TTL = int(os.environ.get("AH_SESSION_TTL", "1800"))
+_SESSIONS: Dict[str, tuple] = {}
+# How long a restored session gets to show the signed-in listing page
+SESSION_CONFIRM_WAIT = 8
+
+
+def session_cache_key(email: str, password: str) -> str:
+    return hashlib.sha256(f"{email.strip().lower()}\0{password}".encode("utf-8")).hexdigest()
+
+
+def save_session(driver, key: str, logs: List[str]) -> None:
+    """Stores the current cookies for key (best-effort)."""
+    try:
+        _SESSIONS[key] = (time.time(), driver.get_cookies())
+        logs.append("Cached login session cookies")
+    except Exception as e:
+        logs.append(f"Could not cache session cookies: {e}")
+
+
+def restore_session(driver, key: str, listing_url: str, logs: List[str]) -> bool:
+    """
+    Injects cached cookies for key and opens listing_url. Returns True once the fully
+    loaded listing page shows listing content (so client-side login redirects have had
+    their chance). On a stale session the cache entry is dropped and the driver is put
+    back on a clean homepage, ready for sign_in in the same run.
+    """
+    saved_at, cookies = _SESSIONS.get(key, (0.0, None))
+    if not cookies:
+        return False
+    if time.time() - saved_at > SESSION_TTL:
+        _SESSIONS.pop(key, None)
+        return False
+
+    try:
+        for c in cookies:
+            try:
+                driver.add_cookie(c)
+            except Exception:
+                pass  # e.g. a cookie for another subdomain
         driver.get(listing_url)
+        try:
+            WebDriverWait(driver, SESSION_CONFIRM_WAIT, poll_frequency=0.2).until(
+                lambda d: cdp_eval(d, _JS_LISTING_READY)
+            )
+            confirmed = True
+        except Exception:
+            confirmed = False
+        note_origins(driver)
+        if confirmed and urlparse(driver.current_url).path.lower() == urlparse(listing_url).path.lower():
+            logs.append("Reused cached login session (sign-in skipped)")
+            return True
+        logs.append(f"Cached session rejected (landed on {driver.current_url})")
+    except Exception as e:
+        logs.append(f"Restoring cached session failed: {e}")
+
+    _SESSIONS.pop(key, None)
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except Exception as e:
+        logs.append(f"Could not clear rejected session cookies: {e}")
+    open_homepage(driver, logs)
+    return False
+
+
+def session_lost(driver, listing_url: str) -> bool:
+    """True when the driver has left listing_url, e.g. after a redirect to sign-in."""
+    try:
+        return urlparse(driver.current_url).path.lower() != urlparse(listing_url).path.lower()
+    except Exception:
+        return False
+
+
+# ---------- selenium worker (modified only for consent + robust clicks) ----------
+# Log lines returned in BoostResponse when the caller did not ask for verbose output
+RESPONSE_LOG_TAIL = 10
+
+
+def _network_precheck_or_raise(test_url: str, logs: List[str]) -> None:
+    """Runs network_precheck; failures raise unless SKIP_NETWORK_CHECK is set."""
+    try:
+        network_precheck(test_url, timeout=6, logs=logs)
+    except Exception as e:
+        logs.append(f"Pre-check failed: {e}")
+        # re-raise to return a helpful response (unless SKIP_NETWORK_CHECK true)
+        if os.environ.get("SKIP_NETWORK_CHECK", "").lower() not in ("1", "true", "yes"):
+            raise Exception(
+                f"Network pre-check failed for {test_url}. Either outbound network is blocked or the site resets connections. Full error: {e}"
+            )
+        # else continue (skip pre-check)
+
+
+def selenium_boost_worker(email: str, password: str, num_buttons: int, headless: bool,
+                          wait_time: int = DEFAULT_WAIT_TIME, include_screenshot: bool = False,
+                          verbose: bool = False) -> BoostResponse:
+    """
+    Signs in, scrolls the listing page and clicks up to num_buttons boost buttons.
+    Screenshots are only captured with include_screenshot; without verbose only the
+    last RESPONSE_LOG_TAIL log lines are returned.
+    """
+    logs: List[str] = []
+    clicked_addresses: List[Optional[str]] = []
+    screenshot_b64 = None
+    driver = None
+    # background jobs still using the driver after the response is built, and their logs
+    # (printed once they finish, see _release_after)
+    bg_jobs: list = []
+    bg_logs: List[str] = []
+    precheck = None
+    listing_url = "https://www.affordablehousing.com/v4/pages/Listing/Listing.aspx"
+    session_key = None
+    session_restored = False
+    navigated = False  # False until the driver leaves about:blank: nothing worth dumping
+    try:
+        logs.append("Starting Selenium worker")
+
+        # network pre-check runs in the background while a driver is acquired/started
+        # (own log list, so a probe abandoned on failure never writes into the response)
+        precheck_logs: List[str] = []
+        precheck = _PRECHECK_POOL.submit(_network_precheck_or_raise, "https://www.affordablehousing.com/", precheck_logs)
+        driver = acquire_driver(headless, logs)
+        try:
+            precheck.result()
+        finally:
+            logs.extend(precheck_logs)
+
+        wait = WebDriverWait(driver, wait_time or DEFAULT_WAIT_TIME)
+
+        navigated = True
+        open_homepage(driver, logs)
+
+        session_key = session_cache_key(email, password)
+        session_restored = restore_session(driver, session_key, listing_url, logs)
+        if not session_restored:
+            sign_in(driver, wait, email, password, logs)
+            save_session(driver, session_key, logs)
+            driver.get(listing_url)
         logs.append(f"Navigated to {listing_url}")
 
-        loops = 0
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        while loops < DEFAULT_MAX_SCROLL_LOOPS:
-            driver.execute_script("window.scrollBy(0, window.innerHeight);")
-            time.sleep(DEFAULT_SCROLL_PAUSE)
-            loops += 1
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                time.sleep(0.5)
-                break
-            last_height = new_height
-        logs.append(f"Finished incremental scrolling ({loops} loops)")
-
-        start = time.time()
-        found_count = 0
-        found_context = None
-        while time.time() - start < DEFAULT_JS_POLL_TIMEOUT:
-            c_buttons = int(driver.execute_script(
-                "return document.querySelectorAll('button.usage-boost-button, button.cmn--btn.usage-boost-button').length || 0;"))
-            logs.append(f"[JS POLL] buttons={c_buttons}")
-            if c_buttons > 0:
-                found_context = ("main", None)
-                found_count = c_buttons
-                break
-            time.sleep(DEFAULT_JS_POLL_INTERVAL)
+        # incremental scrolling + button polling, both run in-page in a single async call
+        driver.set_script_timeout(DEFAULT_MAX_SCROLL_LOOPS * DEFAULT_SCROLL_PAUSE + DEFAULT_JS_POLL_TIMEOUT + 10)
+        scan = driver.execute_async_script(
+            _JS_SCROLL_AND_FIND_BUTTONS,
+            int(DEFAULT_JS_POLL_TIMEOUT * 1000),
+            int(DEFAULT_MAX_SCROLL_LOOPS * DEFAULT_SCROLL_PAUSE * 1000),
+            int(DEFAULT_SCROLL_PAUSE * 1000),
+        ) or {}
+        logs.append(f"Finished incremental scrolling ({scan.get('loops', 0)} steps)")
+        logs.append(f"[JS POLL] buttons={scan.get('n', 0)} waited_ms={scan.get('waitedMs', 0)}")
+
+        found_count = int(scan.get("n") or 0)
+        found_context = ("main", None) if found_count > 0 else None
 
         logs.append(f"[JS POLL RESULT] found_context={found_context} found_count={found_count}")
         if not found_context:
-            try:
-                screenshot_b64 = driver.get_screenshot_as_base64()
-                logs.append("No cards/buttons found - saved screenshot")
-            except Exception:
-                logs.append("Screenshot failed")
+            if include_screenshot:
+                try:
+                    screenshot_b64 = cdp_screenshot(driver)
+                    logs.append("No cards/buttons found - saved screenshot")
+                except Exception:
+                    logs.append("Screenshot failed")
             raise Exception("No listing cards/buttons found after JS polling")
 
-        buttons = driver.find_elements(By.CSS_SELECTOR, "button.usage-boost-button, button.cmn--btn.usage-boost-button")
-        logs.append(f"Collected {len(buttons)} button elements")
+        # text/class/address of every button in one call; filtering happens on plain strings
+        button_meta = cdp_eval(driver, _JS_COLLECT_BUTTONS) or []
+        logs.append(f"Collected {len(button_meta)} button elements")
 
         boostable = []
-        for idx, btn in enumerate(buttons, start=1):
-            try:
-                btn_text = get_element_text_via_js(driver, btn).lower()
-                norm = " ".join(btn_text.split())
-                classes = (btn.get_attribute("class") or "").lower()
-                in_progress = ("usage-boost-inprogress" in classes) or ("progress" in norm) or ("inprogress" in norm)
-                if ("boost" in norm) and not in_progress:
-                    address = find_address_for_button(driver, btn)
-                    boostable.append((address, btn, norm))
-                    logs.append(f"[FOUND] btn#{idx} text='{norm}' addr='{address or '<none>'}'")
-                else:
-                    logs.append(f"[SKIP] btn#{idx} text='{norm[:60]}' in_progress={in_progress}")
-            except Exception as e:
-                logs.append(f"[WARN] error inspecting btn#{idx}: {e}")
+        for rec in button_meta:
+            idx = rec["i"] + 1
+            norm = " ".join((rec.get("text") or "").split())
+            classes = rec.get("classes") or ""
+            in_progress = ("usage-boost-inprogress" in classes) or ("progress" in norm) or ("inprogress" in norm)
+            if ("boost" in norm) and not in_progress:
+                address = rec.get("address") or None
+                boostable.append((address, rec["i"], norm))
+                logs.append(f"[FOUND] btn#{idx} text='{norm}' addr='{address or '<none>'}'")
+            else:
+                logs.append(f"[SKIP] btn#{idx} text='{norm[:60]}' in_progress={in_progress}")
 
         logs.append(f"Total boostable detected: {len(boostable)}")
         if not boostable:
-            try:
-                screenshot_b64 = driver.get_screenshot_as_base64()
-                logs.append("No boostable buttons after filtering - saved screenshot")
-            except Exception:
-                logs.append("screenshot failed")
+            if include_screenshot:
+                try:
+                    screenshot_b64 = cdp_screenshot(driver)
+                    logs.append("No boostable buttons after filtering - saved screenshot")
+                except Exception:
+                    logs.append("screenshot failed")
             raise Exception("No boostable buttons found to click")
 
         to_click = min(num_buttons, len(boostable))
+        targets = boostable[:to_click]
+        # all clicks in one async call; each waits (max 3s) for the button's in-progress state
+        driver.set_script_timeout(to_click * 3.5 + 10)
+        click_results = driver.execute_async_script(
+            _JS_CLICK_BUTTONS, [btn_index for _, btn_index, _ in targets], 3000
+        ) or []
+
         clicked = 0
-        for i in range(to_click):
-            address, btn, text = boostable[i]
-            try:
-                driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-                time.sleep(0.6)
-                driver.execute_script("arguments[0].click();", btn)
-                clicked += 1
-                clicked_addresses.append(address)
-                logs.append(f"Clicked boost for: {address or '<address not found>'}")
-                time.sleep(1.2)
-            except Exception as ce:
-                logs.append(f"Error clicking boost #{i+1}: {ce}")
+        for i, ((address, _, _), res) in enumerate(zip(targets, click_results)):
+            if res.get("error"):
+                logs.append(f"Error clicking boost #{i+1}: {res['error']}")
+                continue
+            clicked += 1
+            clicked_addresses.append(address)
+            note = "" if res.get("confirmed") else " (no in-progress state seen)"
+            logs.append(f"Clicked boost for: {address or '<address not found>'}{note}")
 
         return BoostResponse(
             success=True,
             clicked_count=clicked,
             clicked_addresses=clicked_addresses,
-            debug_logs=logs,
+            debug_logs=logs if verbose else logs[-RESPONSE_LOG_TAIL:],
             error=None,
             screenshot_base64=screenshot_b64
         )
@@ -361,35 +999,73 @@ def selenium_boost_worker(email: str, password: str, num_buttons: int, headless:
         tb = traceback.format_exc()
         logs.append(f"Unhandled exception: {str(exc)}")
         logs.append(tb)
-        try:
-            if driver:
-                screenshot_b64 = driver.get_screenshot_as_base64()
-                logs.append("Captured error screenshot (base64)")
-                # Also save page source for debugging
+        if precheck is not None:
+            precheck.cancel()  # still queued when acquire_driver failed
+        if session_restored and session_lost(driver, listing_url):
+            # sent away from the listing page (login redirect); an empty listing keeps the session
+            _SESSIONS.pop(session_key, None)
+            logs.append("Dropped cached login session after failure")
+        if driver and navigated:
+            # page source is saved in the background; only the screenshot is part of the response
+            bg_jobs.append(_IO_POOL.submit(_dump_page_source, driver, PAGE_SOURCE_PATH, bg_logs))
+            logs.append(f"Page source is being saved to {PAGE_SOURCE_PATH}")
+            if include_screenshot:
+                shot = _IO_POOL.submit(cdp_screenshot, driver)
+                bg_jobs.append(shot)
                 try:
-                    page_html = driver.page_source
-                    path = "/tmp/affordablehousing_page.html"
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.write(page_html)
-                    logs.append(f"Saved page source to {path}")
-                except Exception as e:
-                    logs.append(f"Failed to save page source: {e}")
-        except Exception:
-            pass
+                    screenshot_b64 = shot.result(timeout=5)
+                    logs.append("Captured error screenshot (base64)")
+                except Exception:
+                    pass
 
         return BoostResponse(
             success=False,
             clicked_count=0,
             clicked_addresses=[],
-            debug_logs=logs,
+            debug_logs=logs if verbose else logs[-RESPONSE_LOG_TAIL:],
             error=str(exc),
             screenshot_base64=screenshot_b64
         )
 
     finally:
-        try:
-            if driver:
-                driver.quit()
-                logs.append("Driver.quit() called")
-        except Exception:
-            pass
+        if driver:
+            if bg_jobs:
+                # hand the driver back only once the dump (and a timed-out screenshot) are done with it
+                _release_after(bg_jobs, driver, headless, bg_logs)
+            else:
+                release_driver(driver, headless, logs)
+
+
+# ---------- async facade ----------
+# Dedicated executor sized to the driver pool: one thread per reusable driver, so long
+# Selenium flows never occupy the event loop's default executor
+BOOST_EXEC = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="boost")
+
+
+def shutdown_boost_executor() -> None:
+    """
+    Cancels queued boosts and stops accepting new ones; running ones finish.
+    Call it from the app's shutdown event: an atexit hook would run only after
+    concurrent.futures has already joined the workers and drained the queue.
+    """
+    BOOST_EXEC.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_selenium_boost_worker(**kwargs) -> BoostResponse:
+    """Runs selenium_boost_worker on BOOST_EXEC; for async endpoints such as /boost."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BOOST_EXEC, functools.partial(selenium_boost_worker, **kwargs))
+
+
+async def selenium_boost_worker_batch(reqs: List[dict], max_concurrency: int = POOL_SIZE) -> List[BoostResponse]:
+    """
+    Runs selenium_boost_worker for every request, at most max_concurrency at a time.
+    Each item of reqs holds the worker's keyword arguments; results keep input order.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(req: dict) -> BoostResponse:
+        async with sem:
+            return await run_selenium_boost_worker(**req)
+
+    return list(await asyncio.gather(*(run_one(r) for r in reqs)))